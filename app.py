@@ -1,20 +1,44 @@
-import os, sys, json, time, tkinter as tk
+import os, sys, json, time, collections, importlib, threading, tkinter as tk
 from tkinter import ttk, filedialog, messagebox
 from tkinter import font as tkfont
 from typing import Optional
+from concurrent.futures import ThreadPoolExecutor
 
 import numpy as np
-from PIL import Image, ImageTk
-
-# === algorithms (your exact filenames) ===
-from algorithms.negative import negative
-from algorithms.log_gamma import log_transform, gamma_transform
-from algorithms.smoothing import smooth_box, smooth_gaussian
-from algorithms.sharpening import unsharp_mask
-from algorithms.histrogram import histogram_gray   # (file named histrogram.py)
-from algorithms.resize import resize_nearest, resize_bilinear
-from algorithms.threshold import threshold_apply, otsu_threshold
-from algorithms.edges import sobel_edges
+from PIL import Image, ImageColor, ImageTk
+
+# === algorithms (your exact filenames), imported on first use ===
+_ALGO = {
+    "negative":        ("algorithms.negative", "negative"),
+    "log_transform":   ("algorithms.log_gamma", "log_transform"),
+    "gamma_transform": ("algorithms.log_gamma", "gamma_transform"),
+    "smooth_box":      ("algorithms.smoothing", "smooth_box"),
+    "smooth_gaussian": ("algorithms.smoothing", "smooth_gaussian"),
+    "unsharp_mask":    ("algorithms.sharpening", "unsharp_mask"),
+    "resize_nearest":  ("algorithms.resize", "resize_nearest"),
+    "resize_bilinear": ("algorithms.resize", "resize_bilinear"),
+    "sobel_edges":     ("algorithms.edges", "sobel_edges"),
+}
+_algo_funcs = {}
+
+def _lazy(name: str):
+    """Callable that resolves `name` through _get only when first called (on the worker)."""
+    return lambda *args, **kwargs: _get(name)(*args, **kwargs)
+
+def _get(name: str):
+    """Import the algorithm `name` on first use; the returned callable yields uint8.
+
+    Array arguments are copied first: the app's arrays (original, results, undo
+    states, caches) are shared and read-only, while algorithms may work in place."""
+    func = _algo_funcs.get(name)
+    if func is None:
+        module, attr = _ALGO[name]
+        algo = getattr(importlib.import_module(module), attr)
+        def func(*args, **kwargs):
+            args = tuple(a.copy() if isinstance(a, np.ndarray) else a for a in args)
+            return to_u8(algo(*args, **kwargs))
+        _algo_funcs[name] = func
+    return func
 
 
 # ---------- helper for PyInstaller one-file resources ----------
@@ -29,17 +53,164 @@ def resource_path(rel_path: str) -> str:
 
 # ---------- PIL <-> NumPy helpers ----------
 def pil_to_array(im: Image.Image) -> np.ndarray:
-    if im.mode in ("L", "I;16", "I"):
-        return np.array(im.convert("L"), dtype=np.uint8)
-    return np.array(im.convert("RGB"), dtype=np.uint8)
+    """uint8 (H, W) or (H, W, 3) copy of an image."""
+    if im.mode not in ("L", "RGB"):
+        im = im.convert("L" if im.mode in ("I;16", "I") else "RGB")
+    return np.array(im, dtype=np.uint8)
+
+def to_u8(arr: np.ndarray) -> np.ndarray:
+    if arr.dtype == np.uint8:
+        return arr
+    # clip + cast fused into one pass over a single uint8 buffer
+    return np.clip(arr, 0, 255, out=np.empty(arr.shape, dtype=np.uint8), casting="unsafe")
 
 def array_to_pil(arr: np.ndarray) -> Image.Image:
-    arr = np.clip(arr, 0, 255).astype(np.uint8)
+    arr = np.ascontiguousarray(to_u8(arr))
     if arr.ndim == 2:
-        return Image.fromarray(arr, mode="L")
+        mode = "L"
     elif arr.ndim == 3 and arr.shape[2] == 3:
-        return Image.fromarray(arr, mode="RGB")
-    raise ValueError("Unsupported array shape")
+        mode = "RGB"
+    else:
+        raise ValueError("Unsupported array shape")
+    h, w = arr.shape[:2]
+    return Image.frombuffer(mode, (w, h), arr, "raw", mode, 0, 1)
+
+_LUMA_WEIGHTS = np.array([0.299, 0.587, 0.114], dtype=np.float32)
+
+def gray_u8(arr: np.ndarray) -> np.ndarray:
+    """Rec. 601 luma of an RGB array as uint8; gray input is returned as-is."""
+    if arr.ndim == 2:
+        return arr
+    luma = np.einsum("hwc,c->hw", arr, _LUMA_WEIGHTS, dtype=np.float32)
+    luma += np.float32(0.5)
+    return luma.astype(np.uint8)
+
+def _gray_bytes(arr: np.ndarray) -> np.ndarray:
+    """Flat uint8 luma; RGB goes through Pillow's integer convert("L") (same Rec. 601
+    weights as gray_u8, rounding may differ by one level). Pillow copies RGB input
+    into its own storage, so this is not a memory saving over gray_u8."""
+    arr = to_u8(arr)
+    if arr.ndim == 2:
+        return arr.ravel()
+    return np.frombuffer(array_to_pil(arr).convert("L").tobytes(), dtype=np.uint8)
+
+# above this many pixels histogram_u8 splits the bincount across threads
+HIST_PARALLEL_MIN = 16 << 20
+
+def histogram_gray_parallel(flat: np.ndarray, nthreads: int = 4) -> np.ndarray:
+    """bincount of flat uint8 data as per-thread partial histograms summed at the end.
+    bincount releases the GIL and each worker owns its own bins, so nothing is shared."""
+    chunks = np.array_split(flat, nthreads)
+    with ThreadPoolExecutor(nthreads) as ex:
+        parts = list(ex.map(lambda c: np.bincount(c, minlength=256), chunks))
+    return np.sum(parts, axis=0, dtype=np.int64)
+
+def histogram_u8(arr: np.ndarray) -> np.ndarray:
+    """256-bin int64 gray histogram in a single bincount pass (RGB goes through luma)."""
+    flat = _gray_bytes(arr)
+    ncpu = os.cpu_count() or 1
+    if flat.size > HIST_PARALLEL_MIN and ncpu > 1:
+        return histogram_gray_parallel(flat, min(4, ncpu))
+    return np.bincount(flat, minlength=256).astype(np.int64, copy=False)
+
+def histogram_pil(arr: np.ndarray) -> np.ndarray:
+    """Same counts as histogram_u8 from Pillow's C Image.histogram(); falls back to
+    histogram_u8 for arrays Pillow cannot wrap."""
+    try:
+        im = array_to_pil(arr)
+    except ValueError:
+        return histogram_u8(arr)
+    if im.mode != "L":
+        im = im.convert("L")
+    return np.asarray(im.histogram(), dtype=np.int64)
+
+# above this many 2-D taps (k > 7) smoothing/sharpening skip the direct 2-D kernels
+SEPARABLE_MIN_TAPS = 49
+
+def gaussian_kernel_1d(size: int, sigma: float) -> np.ndarray:
+    x = np.arange(size, dtype=np.float32) - (size // 2)
+    k = np.exp(-(x * x) / np.float32(2.0 * sigma * sigma))
+    return k / k.sum()
+
+def _round_u8(a: np.ndarray) -> np.ndarray:
+    np.rint(a, out=a)
+    return np.clip(a, 0, 255, out=np.empty(a.shape, dtype=np.uint8), casting="unsafe")
+
+def _convolve_separable(a: np.ndarray, k1d: np.ndarray) -> np.ndarray:
+    """Convolve float32 `a` along rows then columns with `k1d` (edge padded)."""
+    r = len(k1d) // 2
+    for axis in (0, 1):
+        pad = [(0, 0)] * a.ndim; pad[axis] = (r, r)
+        p = np.pad(a, pad, mode="edge")
+        acc = np.zeros_like(a)
+        n = a.shape[axis]
+        for i, w in enumerate(k1d):
+            sl = [slice(None)] * a.ndim; sl[axis] = slice(i, i + n)
+            acc += w * p[tuple(sl)]
+        a = acc
+    return a
+
+def smooth_separable(arr: np.ndarray, k1d: np.ndarray) -> np.ndarray:
+    """Smooth with the outer product of `k1d`: O(k) per pixel, not O(k²)."""
+    return _round_u8(_convolve_separable(arr.astype(np.float32), k1d))
+
+def unsharp_separable(arr: np.ndarray, size: int, sigma: float, amount: float) -> np.ndarray:
+    """arr + amount * (arr - gaussian(arr)), with the mask math done in the blur buffer."""
+    a = arr.astype(np.float32)
+    blur = _convolve_separable(a, gaussian_kernel_1d(size, sigma))
+    np.subtract(a, blur, out=blur)
+    np.multiply(blur, np.float32(amount), out=blur)
+    np.add(a, blur, out=blur)
+    return _round_u8(blur)
+
+def smooth_box_integral(arr: np.ndarray, size: int) -> np.ndarray:
+    """Box mean via a summed-area table: four lookups per pixel for any `size`."""
+    r = size // 2
+    p = np.pad(arr, [(r, r), (r, r)] + [(0, 0)] * (arr.ndim - 2), mode="edge")
+    ii = np.zeros((p.shape[0] + 1, p.shape[1] + 1) + p.shape[2:], dtype=np.int64)
+    np.cumsum(p, axis=0, out=ii[1:, 1:])
+    np.cumsum(ii[1:, 1:], axis=1, out=ii[1:, 1:])
+    k, n = size, size * size
+    s = ii[k:, k:] - ii[:-k, k:] - ii[k:, :-k] + ii[:-k, :-k]
+    s += n // 2
+    s //= n
+    return s.astype(np.uint8)
+
+def otsu_from_hist(hist: np.ndarray) -> int:
+    """Otsu threshold T (classes < T and >= T) from a 256-bin histogram."""
+    p = hist.astype(np.float64)
+    omega = np.cumsum(p)                    # pixel count at or below t
+    mu = np.cumsum(p * np.arange(256))      # first moment at or below t
+    total, mu_t = omega[-1], mu[-1]
+    denom = omega * (total - omega)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        sigma_b = np.where(denom > 0, (mu_t * omega - mu * total) ** 2 / denom, 0.0)
+    return int(np.argmax(sigma_b)) + 1
+
+def threshold_u8(arr: np.ndarray, T: int) -> np.ndarray:
+    """255 where luma >= T else 0, written straight into one uint8 buffer."""
+    gray = gray_u8(arr)
+    out = np.empty(gray.shape, dtype=np.uint8)
+    np.greater_equal(gray, T, out=out.view(np.bool_))
+    out *= np.uint8(255)
+    return out
+
+def threshold_otsu_apply(arr: np.ndarray):
+    """Otsu binarisation from exact counts of the plane it thresholds; returns (T, out)."""
+    gray = gray_u8(arr)
+    T = otsu_from_hist(histogram_u8(gray))
+    return T, threshold_u8(gray, T)
+
+
+# ---------- App settings ----------
+# longest side of the working copy used while "Fast preview" is on
+PREVIEW_MAX_SIDE = 1024
+
+# undo/redo depth; older snapshots are dropped
+UNDO_MAX = 8
+
+# histogram x-axis tick labels (every 64 levels)
+_XTICKS = tuple(str(t) for t in range(0, 256, 64))
 
 
 class ImageToolkitApp(tk.Tk):
@@ -51,12 +222,54 @@ class ImageToolkitApp(tk.Tk):
 
         # state
         self.img_open: Optional[Image.Image] = None
-        self.img: Optional[Image.Image] = None
-        self.undo_stack, self.redo_stack = [], []
+        self.arr_open: Optional[np.ndarray] = None   # img_open as uint8 array
+        self.arr: Optional[np.ndarray] = None        # current output
+        self.steps = ()                              # step(a) -> out callables that produced self.arr
+        self._out_pil = None                         # (arr, PIL) built lazily from self.arr
+        self.preview_img: Optional[Image.Image] = None   # downsampled img_open for fast preview
+        self.preview_arr: Optional[np.ndarray] = None
+        self.fast_preview_var = tk.BooleanVar(value=False)
+        self.undo_stack, self.redo_stack = [], []    # (arr, steps) states
         self.open_filename = None
 
+        # LRU of filter outputs: (id(src), op, params...) -> (src, uint8 array)
+        self._result_cache = collections.OrderedDict()
+        self._result_cache_max = 8
+
+        # fitted previews per canvas: canvas -> (cw, ch, im, resample, photo)
+        self._last_fit = {}
+        # histogram window's counts for the last source shown; display only (large
+        # sources are subsampled, Otsu counts its own); dropped whenever self.arr changes
+        self._hist_cache = None
+        self._hist_cache_key = None   # the source array itself (compared with `is`)
+        # luma of recent sources, shared by histogram/threshold/Otsu/Sobel
+        self._luma_cache = collections.OrderedDict()
+        # 256-entry tables for pointwise transforms: (op, param) -> lut
+        self._lut_cache = {}
+        self._resize_after = None
+        self._render_pending = False
+        self._last_render_size = None
+        # filters run on a worker thread; the caches above are shared with it
+        self._lock = threading.Lock()
+        self._busy = False
+        self._hist_pool = ThreadPoolExecutor(max_workers=1)
+        # the one histogram window, kept open and redrawn in place when the image changes
+        self._hist_win = None
+        self._hist_canvas = None
+        self._hist_box = None
+        self._hist_src = None   # source whose bars are currently drawn
+        self._hist_future = None   # pending count for _hist_src, if any
+        self._hist_ylabels_cache = None   # (maxh, log, y tick labels)
+        self._hist_log = tk.BooleanVar(value=False)   # log-scaled bar heights
+        self._hist_buf = None   # (box, cols, ys, mask, rgb) reused by every bar redraw
+
         self._button_refs = []  # (btn, color_key)
 
+        # developer avatar: placeholder built once, real photo reloaded only on path change
+        self._dev_placeholder_tk = ImageTk.PhotoImage(Image.new("RGB", (72, 72), (30, 40, 48)))
+        self._dev_photo_tk = None
+        self._last_dev_photo_path = None
+
         self._init_theme()
         self._build_menu()
         self._build_layout()
@@ -133,6 +346,10 @@ class ImageToolkitApp(tk.Tk):
         file_menu.add_separator()
         file_menu.add_command(label="Exit", command=self.quit)
         menubar.add_cascade(label="File", menu=file_menu)
+        view_menu = tk.Menu(menubar, tearoff=0)
+        view_menu.add_checkbutton(label="Fast preview (full size on save)",
+                                  variable=self.fast_preview_var, command=self._on_fast_preview)
+        menubar.add_cascade(label="View", menu=view_menu)
         self.config(menu=menubar)
 
         self.bind_all("<Control-o>", lambda e: self.open_image())
@@ -204,17 +421,17 @@ class ImageToolkitApp(tk.Tk):
 
         # Row 2
         tbtn("blue", "Negative",
-             lambda: self._apply_simple(negative, "Negative"), 1, 0)
+             lambda: self._apply_simple(_lazy("negative"), "Negative"), 1, 0)
         tbtn("blue", "Smoothing", self._dlg_smoothing, 1, 1)
         tbtn("blue", "Sharpen", self._dlg_sharpen, 1, 2)
         tbtn("blue", "Threshold", self._dlg_threshold, 1, 3)
         tbtn("blue", "Edges",
-             lambda: self._apply_simple(sobel_edges, "Sobel Edges"), 1, 4)
+             lambda: self._apply_simple(_lazy("sobel_edges"), "Sobel Edges", luma=True), 1, 4)
 
         # Row 3
         tbtn("blue", "Histogram", self.show_histogram, 2, 0)
         tbtn("orange", "Log Transform",
-             lambda: self._apply_simple(log_transform, "Log Transform"), 2, 1)
+             lambda: self._apply_simple(_lazy("log_transform"), "Log Transform"), 2, 1)
         tbtn("orange", "Gamma Transform", self._dlg_gamma, 2, 2)
         tbtn("gray", "Resize", self._dlg_resize, 2, 3)
 
@@ -250,15 +467,18 @@ class ImageToolkitApp(tk.Tk):
         self.canvas_orig.grid(row=0, column=0, sticky="nsew", padx=(0, 16))
         self.canvas_proc.grid(row=0, column=1, sticky="nsew", padx=(16, 0))
         self._canvases = [self.canvas_orig, self.canvas_proc]
+        # one persistent image item per canvas, updated in place on every render
+        self._orig_item = self.canvas_orig.create_image(0, 0, anchor="center")
+        self._proc_item = self.canvas_proc.create_image(0, 0, anchor="center")
 
         # ===== Status =====
         self.status = ttk.Label(self, text="Open an image to begin.",
                                 anchor="w", style="Subtle.TLabel")
         self.status.grid(row=4, column=0, sticky="ew", padx=12, pady=(0, 10))
+        self.progress = ttk.Progressbar(self, mode="indeterminate", length=160)
 
-        def _initial_render(_e=None): self._render_images()
-        self.canvas_orig.bind("<Configure>", _initial_render)
-        self.canvas_proc.bind("<Configure>", _initial_render)
+        self.canvas_orig.bind("<Configure>", self._on_canvas_configure)
+        self.canvas_proc.bind("<Configure>", self._on_canvas_configure)
 
     # helpers
     def _brighten(self, hex_color):
@@ -293,14 +513,19 @@ class ImageToolkitApp(tk.Tk):
         self._set_dev_photo(photo)
 
     def _set_dev_photo(self, path: Optional[str]):
+        if not (path and os.path.exists(path)):
+            path = None
+        if self._dev_photo_tk is not None and path == self._last_dev_photo_path:
+            return
         try:
-            if path and os.path.exists(path):
+            if path:
                 im = Image.open(path).convert("RGB")
+                im = im.resize((72, 72), Image.LANCZOS)   # slightly larger avatar
+                self._dev_photo_tk = ImageTk.PhotoImage(im)
             else:
-                im = Image.new("RGB", (96, 96), (30, 40, 48))
-            im = im.resize((72, 72), Image.LANCZOS)   # slightly larger avatar
-            self._dev_photo_tk = ImageTk.PhotoImage(im)
+                self._dev_photo_tk = self._dev_placeholder_tk
             self.dev_photo_label.configure(image=self._dev_photo_tk)
+            self._last_dev_photo_path = path
         except Exception:
             pass
 
@@ -339,6 +564,8 @@ class ImageToolkitApp(tk.Tk):
 
     # ---------- File ops ----------
     def open_image(self):
+        if self._busy:
+            return
         path = filedialog.askopenfilename(filetypes=[("Image files", "*.png *.jpg *.jpeg *.bmp *.tif *.tiff")])
         if not path:
             return
@@ -349,96 +576,350 @@ class ImageToolkitApp(tk.Tk):
             return
 
         self.img_open = im.convert("RGB")
-        self.img = None
+        self.arr_open = pil_to_array(self.img_open)
+        self.arr_open.setflags(write=False)   # shared by every state; see _get
+        w, h = self.img_open.size
+        f = PREVIEW_MAX_SIDE / max(w, h)
+        if f < 1:
+            self.preview_img = self.img_open.resize((max(1, int(w * f)), max(1, int(h * f))), Image.BILINEAR)
+            self.preview_arr = pil_to_array(self.preview_img)
+            self.preview_arr.setflags(write=False)
+        else:
+            self.preview_img, self.preview_arr = self.img_open, self.arr_open
+        self.arr, self.steps = None, ()
         self.open_filename = os.path.basename(path)
         self.undo_stack.clear(); self.redo_stack.clear()
+        self._result_cache.clear(); self._lut_cache.clear(); self._invalidate_histogram()
+        self._luma_cache.clear()
         self._render_images()
         self.orig_title_var.set("Original Image")
         self.proc_title_var.set("Output Image — (apply any operation)")
         self._set_status(f"Loaded: {self.open_filename}  |  {self.img_open.width}×{self.img_open.height}")
 
     def save_as(self):
-        if self.img is None:
+        if self.arr is None:
             messagebox.showinfo("Save Output Image", "No result yet. Apply an operation first.")
             return
+        if self._busy:
+            self._set_status("Still processing the previous operation…")
+            return
         path = filedialog.asksaveasfilename(defaultextension=".png",
                     filetypes=[("PNG", "*.png"), ("JPEG", "*.jpg *.jpeg"), ("BMP", "*.bmp"), ("TIFF", "*.tif *.tiff")])
         if not path:
             return
-        try:
-            self.img.save(path)
+        img = self._output_image()
+        full_res = self.fast_preview_var.get() and self.preview_arr is not self.arr_open
+        base, steps = self.arr_open, self.steps
+        def compute():
+            # fast preview: re-run the steps on the original before writing
+            out = array_to_pil(self._replay(base, steps)) if full_res else img
+            out.save(path)
+        def done(_, dt):
             self.proc_title_var.set("Output Image — saved")
             self._set_status(f"Saved to {os.path.basename(path)}")
-        except Exception as e:
+        def failed(e):
             messagebox.showerror("Save Output Image", f"Could not save:\n{e}")
+        if full_res:
+            self._set_status("Rendering full resolution…")
+        self._run_async(compute, done, failed)
 
     def reset_image(self):
-        if self.img_open is None:
+        if self.img_open is None or self._busy:
             return
-        self.img = None
+        self.arr, self.steps = None, ()
         self.undo_stack.clear(); self.redo_stack.clear()
+        self._invalidate_histogram()
         self._render_images()
         self.proc_title_var.set("Output Image — (apply any operation)")
         self._set_status("Reset (showing original only)")
 
     def undo(self):
-        if not self.undo_stack:
+        if not self.undo_stack or self._busy:
             return
-        self.redo_stack.append(self.img.copy() if self.img is not None else None)
-        self.img = self.undo_stack.pop()
+        self._push_state(self.redo_stack, (self.arr, self.steps))
+        self.arr, self.steps = self.undo_stack.pop()
+        self._invalidate_histogram()
         self._render_images()
         self._set_status("Undo")
 
     def redo(self):
-        if not self.redo_stack:
+        if not self.redo_stack or self._busy:
             return
-        self.undo_stack.append(self.img.copy() if self.img is not None else None)
-        self.img = self.redo_stack.pop()
+        self._push_state(self.undo_stack, (self.arr, self.steps))
+        self.arr, self.steps = self.redo_stack.pop()
+        self._invalidate_histogram()
         self._render_images()
         self._set_status("Redo")
 
+    def _push_state(self, stack, state):
+        """Append (arr, steps) and drop the oldest past UNDO_MAX."""
+        stack.append(state)
+        del stack[:-UNDO_MAX]
+
+    # ---------- Fast preview ----------
+    def _base_arr(self) -> Optional[np.ndarray]:
+        return self.preview_arr if self.fast_preview_var.get() else self.arr_open
+
+    def _base_img(self) -> Optional[Image.Image]:
+        return self.preview_img if self.fast_preview_var.get() else self.img_open
+
+    @staticmethod
+    def _replay(base, steps, start=None):
+        """Re-run `steps` from `base` (or from `start`, the result of steps already
+        applied), keeping only the running result; None when there are no steps."""
+        out = start
+        for step in steps:
+            out = step(base if out is None else out)
+        return out
+
+    def _replay_states(self, base, states):
+        """Rebuild (arr, steps) states from `base`. Each one resumes from the longest
+        already-rebuilt state that is a prefix of it, so only the states are kept."""
+        built = {(): None}
+        for steps in sorted({st for _, st in states}, key=len):
+            k = next(n for n in range(len(steps), -1, -1) if steps[:n] in built)
+            built[steps] = self._replay(base, steps[k:], built[steps[:k]])
+        return [(built[st], st) for _, st in states]
+
+    def _on_fast_preview(self):
+        if self._busy:
+            # the menu has already flipped the variable; put it back
+            self.fast_preview_var.set(not self.fast_preview_var.get())
+            return
+        if self.img_open is None:
+            return
+        # recompute every state at the newly selected resolution on the worker;
+        # nothing is swapped in unless all of them succeed
+        base = self._base_arr()
+        undo, redo, cur = list(self.undo_stack), list(self.redo_stack), (self.arr, self.steps)
+        def compute():
+            states = self._replay_states(base, undo + redo + [cur])
+            return states[:len(undo)], states[len(undo):-1], states[-1]
+        def done(result, dt):
+            undo, redo, cur = result
+            for arr, _ in undo + redo + [cur]:
+                if arr is not None:
+                    arr.setflags(write=False)
+            self.undo_stack[:], self.redo_stack[:], (self.arr, self.steps) = undo, redo, cur
+            self._invalidate_histogram()
+            self._render_images()
+            self._set_status("Fast preview on" if self.fast_preview_var.get() else "Fast preview off")
+        def failed(e):
+            self.fast_preview_var.set(not self.fast_preview_var.get())
+            messagebox.showerror("Fast preview", f"Could not switch resolution:\n{e}")
+        self._set_status("Re-rendering history…")
+        self._run_async(compute, done, failed)
+
     # ---------- Rendering ----------
-    def _fit_to_canvas(self, im: Image.Image, canvas: tk.Canvas) -> ImageTk.PhotoImage:
+    def _fit_to_canvas(self, im: Image.Image, canvas: tk.Canvas,
+                       resample=Image.LANCZOS) -> ImageTk.PhotoImage:
         cw = int(canvas.winfo_width() or 10)
         ch = int(canvas.winfo_height() or 10)
         if cw < 20 or ch < 20:
             cw, ch = 400, 300
+        last = self._last_fit.get(canvas)
+        if last is not None and last[:2] == (cw, ch) and last[2] is im and last[3] == resample:
+            return last[4]
         w, h = im.width, im.height
         scale = min(cw / w, ch / h)
-        disp = im.resize((max(1, int(w * scale)), max(1, int(h * scale))), Image.LANCZOS)
-        return ImageTk.PhotoImage(disp)
+        disp = im.resize((max(1, int(w * scale)), max(1, int(h * scale))), resample)
+        photo = ImageTk.PhotoImage(disp)
+        self._last_fit[canvas] = (cw, ch, im, resample, photo)
+        return photo
+
+    def _on_canvas_configure(self, _e=None):
+        # cheap bilinear preview while the window is being dragged,
+        # then one LANCZOS pass once the size has settled
+        self._schedule_render()
+        if self._resize_after is not None:
+            self.after_cancel(self._resize_after)
+        self._resize_after = self.after(80, self._settle_render)
+
+    def _schedule_render(self):
+        """Collapse a burst of <Configure> events into one render at idle time."""
+        if self._render_pending:
+            return
+        self._render_pending = True
+        self.after_idle(self._do_render)
+
+    def _do_render(self):
+        self._render_pending = False
+        size = (self.canvas_orig.winfo_width(), self.canvas_orig.winfo_height(),
+                self.canvas_proc.winfo_width(), self.canvas_proc.winfo_height())
+        if size == self._last_render_size:
+            return
+        self._last_render_size = size
+        self._render_images(resample=Image.BILINEAR)
+
+    def _settle_render(self):
+        self._resize_after = None
+        self._render_images()
 
-    def _render_images(self):
-        self.canvas_orig.delete("all")
-        self.canvas_proc.delete("all")
+    def _render_images(self, resample=Image.LANCZOS):
         if self.img_open:
-            tki1 = self._fit_to_canvas(self.img_open, self.canvas_orig); self._tki1 = tki1
-            self.canvas_orig.create_image(self.canvas_orig.winfo_width() // 2,
-                                          self.canvas_orig.winfo_height() // 2, image=tki1)
-        if self.img:
-            tki2 = self._fit_to_canvas(self.img, self.canvas_proc); self._tki2 = tki2
-            self.canvas_proc.create_image(self.canvas_proc.winfo_width() // 2,
-                                          self.canvas_proc.winfo_height() // 2, image=tki2)
+            tki1 = self._fit_to_canvas(self.img_open, self.canvas_orig, resample); self._tki1 = tki1
+            self.canvas_orig.itemconfig(self._orig_item, image=tki1)
+            self.canvas_orig.coords(self._orig_item, self.canvas_orig.winfo_width() // 2,
+                                    self.canvas_orig.winfo_height() // 2)
+        else:
+            self.canvas_orig.itemconfig(self._orig_item, image="")
+        if self.arr is not None:
+            tki2 = self._fit_to_canvas(self._output_image(), self.canvas_proc, resample); self._tki2 = tki2
+            self.canvas_proc.itemconfig(self._proc_item, image=tki2)
+            self.canvas_proc.coords(self._proc_item, self.canvas_proc.winfo_width() // 2,
+                                    self.canvas_proc.winfo_height() // 2)
+        else:
+            self.canvas_proc.itemconfig(self._proc_item, image="")
+        self._refresh_histogram_if_open()
+
+    def _output_image(self) -> Optional[Image.Image]:
+        """PIL view of self.arr, built on demand and reused until self.arr changes."""
+        if self.arr is None:
+            return None
+        if self._out_pil is None or self._out_pil[0] is not self.arr:
+            self._out_pil = (self.arr, array_to_pil(self.arr))
+        return self._out_pil[1]
 
     def _set_status(self, msg: str):
         self.status.configure(text=msg)
 
     # ---------- Apply helpers ----------
-    def _apply_simple(self, func, name):
+    def _push_result(self, out, step):
+        # results are shared with the caches, undo states and the output PIL view
+        out.setflags(write=False)
+        self._push_state(self.undo_stack, (self.arr, self.steps))
+        self.redo_stack.clear()
+        self.arr, self.steps = out, self.steps + (step,)
+        self._invalidate_histogram()
+
+    def _set_busy(self, busy: bool):
+        self._busy = busy
+        for btn, _ in self._button_refs:
+            btn.configure(state="disabled" if busy else "normal")
+        if busy:
+            self.progress.grid(row=4, column=0, sticky="e", padx=12, pady=(0, 10))
+            self.progress.start(12)
+        else:
+            self.progress.stop()
+            self.progress.grid_remove()
+
+    def _run_async(self, compute, on_done, on_error=None):
+        """Run compute() on a worker thread, then on_done(result, ms) on the Tk thread.
+        A failure goes to on_error(exc) there if given, else to an error box.
+        Returns False, without running anything, while another job is in flight."""
+        if self._busy:
+            self._set_status("Still processing the previous operation…")
+            return False
+        self._set_busy(True)
+        box = {}
+        def work():
+            t0 = time.time()
+            try:
+                box["result"] = compute()
+            except Exception as e:
+                box["error"] = e
+            box["dt"] = (time.time() - t0) * 1000
+        worker = threading.Thread(target=work, daemon=True)
+        worker.start()
+        def poll():
+            if worker.is_alive():
+                self.after(30, poll)
+                return
+            self._set_busy(False)
+            if "error" in box:
+                if on_error is not None:
+                    on_error(box["error"])
+                else:
+                    messagebox.showerror("Processing", f"Operation failed:\n{box['error']}")
+            else:
+                on_done(box["result"], box["dt"])
+        self.after(30, poll)
+        return True
+
+    def _cached_result(self, src, key, compute):
+        """Return compute() for `src`, reusing a recent result with the same key."""
+        key = (id(src),) + tuple(key)
+        with self._lock:
+            hit = self._result_cache.get(key)
+            if hit is not None:
+                self._result_cache.move_to_end(key)
+                return hit[1]
+        out = compute()
+        with self._lock:
+            # keep src referenced so its id() cannot be recycled while cached
+            self._result_cache[key] = (src, out)
+            if len(self._result_cache) > self._result_cache_max:
+                self._result_cache.popitem(last=False)
+        return out
+
+    def _get_luma(self, arr):
+        """gray_u8(arr), computed once per source array."""
+        if arr.ndim == 2:
+            return arr
+        with self._lock:
+            hit = self._luma_cache.get(id(arr))
+            if hit is not None:
+                self._luma_cache.move_to_end(id(arr))
+                return hit[1]
+        luma = gray_u8(arr)
+        with self._lock:
+            self._luma_cache[id(arr)] = (arr, luma)
+            if len(self._luma_cache) > 4:
+                self._luma_cache.popitem(last=False)
+        return luma
+
+    def _cached_histogram(self, src) -> Optional[np.ndarray]:
+        with self._lock:
+            return self._hist_cache if self._hist_cache_key is src else None
+
+    def _invalidate_histogram(self):
+        with self._lock:
+            self._hist_cache = self._hist_cache_key = None
+
+    def _gray_histogram(self, src):
+        hist = self._cached_histogram(src)
+        if hist is not None:
+            return hist
+        # sample ~1M pixels on a regular grid ("number of jumps"); the chart shape is
+        # unchanged and scaling by step² keeps the y-axis in approximate pixel counts
+        step = max(1, int(np.sqrt(src.shape[0] * src.shape[1] / 1_000_000)))
+        if step > 1:
+            hist = histogram_pil(src[::step, ::step]) * (step * step)
+        else:
+            hist = histogram_pil(src)
+        with self._lock:
+            self._hist_cache, self._hist_cache_key = hist, src
+        return hist
+
+    def _pointwise_lut(self, func, key, arr):
+        """Apply `func` to uint8 `arr` through a cached 256-entry table.
+
+        `func` must be pointwise: each output level depends only on the input level,
+        never on the rest of the image (min/max normalisation would break this).
+        gamma_transform is the only caller and maps levels that way."""
+        key = tuple(key)
+        with self._lock:
+            lut = self._lut_cache.get(key)
+        if lut is None:
+            lut = to_u8(func(np.arange(256, dtype=np.uint8)))
+            with self._lock:
+                self._lut_cache[key] = lut
+        return lut[arr]
+
+    def _apply_simple(self, func, name, luma=False):
         if self.img_open is None:
             return
-        src = self.img if self.img is not None else self.img_open
-        arr = pil_to_array(src)
-        t0 = time.time()
-        out = func(arr)
-        dt = (time.time() - t0) * 1000
-
-        self.undo_stack.append(self.img.copy() if self.img is not None else None)
-        self.redo_stack.clear()
-        self.img = array_to_pil(out)
-        self._render_images()
-        self.proc_title_var.set(f"Output Image — {name}")
-        self._set_status(f"{name} in {dt:.1f} ms | {self.img.width}×{self.img.height}")
+        src = self.arr if self.arr is not None else self._base_arr()
+        if luma:
+            step = lambda a: func(self._get_luma(a))
+        else:
+            step = func
+        def done(out, dt):
+            self._push_result(out, step)
+            self._render_images()
+            self.proc_title_var.set(f"Output Image — {name}")
+            self._set_status(f"{name} in {dt:.1f} ms | {out.shape[1]}×{out.shape[0]}")
+        self._run_async(lambda: self._cached_result(src, (name,), lambda: step(src)), done)
 
     # ---------- small helpers for dialogs ----------
     def _odd_spinbox(self, parent, from_=3, to=11, initial=3):
@@ -489,24 +970,31 @@ class ImageToolkitApp(tk.Tk):
         sigma_var = self._labeled_scale(win, "Sigma (Gaussian)", 0.5, 5.0, 1.0, resolution=0.1)
 
         def apply():
-            src = self.img if self.img is not None else self.img_open
-            arr = pil_to_array(src)
+            src = self.arr if self.arr is not None else self._base_arr()
             size = int(k_var.get())
-            t0 = time.time()
+            sigma = float(sigma_var.get())
+            separable = size * size > SEPARABLE_MIN_TAPS
             if type_var.get() == "Gaussian":
-                out = smooth_gaussian(arr, size=size, sigma=float(sigma_var.get()))
-                name = f"Smoothing (Gaussian, k={size}, σ={float(sigma_var.get()):.2f})"
+                if separable:
+                    func = lambda a: smooth_separable(a, gaussian_kernel_1d(size, sigma))
+                else:
+                    func = lambda a: _get("smooth_gaussian")(a, size=size, sigma=sigma)
+                key = ("smooth_gaussian", size, sigma)
+                name = f"Smoothing (Gaussian, k={size}, σ={sigma:.2f})"
             else:
-                out = smooth_box(arr, size=size)
+                if separable:
+                    func = lambda a: smooth_box_integral(a, size)
+                else:
+                    func = lambda a: _get("smooth_box")(a, size=size)
+                key = ("smooth_box", size)
                 name = f"Smoothing (Box, k={size})"
-            dt = (time.time() - t0) * 1000
-            self.undo_stack.append(self.img.copy() if self.img is not None else None)
-            self.redo_stack.clear()
-            self.img = array_to_pil(out)
-            self._render_images()
-            self.proc_title_var.set(f"Output Image — {name}")
-            self._set_status(f"{name} in {dt:.1f} ms")
-            win.destroy()
+            def done(out, dt):
+                self._push_result(out, func)
+                self._render_images()
+                self.proc_title_var.set(f"Output Image — {name}")
+                self._set_status(f"{name} in {dt:.1f} ms")
+            if self._run_async(lambda: self._cached_result(src, key, lambda: func(src)), done):
+                win.destroy()
 
         ttk.Button(win, text="Apply", command=apply).pack(pady=12)
 
@@ -525,19 +1013,21 @@ class ImageToolkitApp(tk.Tk):
         amount_var = self._labeled_scale(win, "Amount", 0.2, 3.0, 1.0, resolution=0.1)
 
         def apply():
-            src = self.img if self.img is not None else self.img_open
-            arr = pil_to_array(src)
+            src = self.arr if self.arr is not None else self._base_arr()
             size = int(k_var.get())
-            t0 = time.time()
-            out = unsharp_mask(arr, size=size, sigma=float(sigma_var.get()), amount=float(amount_var.get()))
-            dt = (time.time() - t0) * 1000
-            self.undo_stack.append(self.img.copy() if self.img is not None else None)
-            self.redo_stack.clear()
-            self.img = array_to_pil(out)
-            self._render_images()
-            self.proc_title_var.set(f"Output Image — Sharpen (k={size}, σ={float(sigma_var.get()):.2f}, amt={float(amount_var.get()):.2f})")
-            self._set_status(f"Sharpen in {dt:.1f} ms")
-            win.destroy()
+            sigma, amount = float(sigma_var.get()), float(amount_var.get())
+            if size * size > SEPARABLE_MIN_TAPS:
+                func = lambda a: unsharp_separable(a, size, sigma, amount)
+            else:
+                func = lambda a: _get("unsharp_mask")(a, size=size, sigma=sigma, amount=amount)
+            def done(out, dt):
+                self._push_result(out, func)
+                self._render_images()
+                self.proc_title_var.set(f"Output Image — Sharpen (k={size}, σ={sigma:.2f}, amt={amount:.2f})")
+                self._set_status(f"Sharpen in {dt:.1f} ms")
+            if self._run_async(lambda: self._cached_result(src, ("unsharp_mask", size, sigma, amount),
+                                                           lambda: func(src)), done):
+                win.destroy()
 
         ttk.Button(win, text="Apply", command=apply).pack(pady=12)
 
@@ -561,28 +1051,40 @@ class ImageToolkitApp(tk.Tk):
         row2 = ttk.Frame(win); row2.pack(fill="x", padx=pad, pady=(10, 0))
         ttk.Label(row2, text="Method", width=18).pack(side="left")
         method_var = tk.StringVar(value="Bilinear")
-        ttk.Combobox(row2, textvariable=method_var, values=["Nearest", "Bilinear"],
-                     state="readonly", width=12, style="Cmb.TCombobox").pack(side="left", padx=(6, 0))
+        ttk.Combobox(row2, textvariable=method_var,
+                     values=["Nearest", "Bilinear", "Nearest (NumPy)", "Bilinear (NumPy)"],
+                     state="readonly", width=16, style="Cmb.TCombobox").pack(side="left", padx=(6, 0))
 
         def apply():
-            src = self.img if self.img is not None else self.img_open
-            arr = pil_to_array(src)
+            src = self.arr if self.arr is not None else self._base_arr()
             scale = max(1, int(scale_val.get()))
-            new_w = max(1, int(arr.shape[1] * scale / 100.0))
-            new_h = max(1, int(arr.shape[0] * scale / 100.0))
-            t0 = time.time()
-            if method_var.get() == "Nearest":
-                out = resize_nearest(arr, new_h, new_w); mname = "Nearest"
+            mname = method_var.get()
+            def new_size(a):
+                return (max(1, int(a.shape[1] * scale / 100.0)),
+                        max(1, int(a.shape[0] * scale / 100.0)))
+            if mname in ("Nearest", "Bilinear"):
+                resample = Image.NEAREST if mname == "Nearest" else Image.BILINEAR
+                step = lambda a: pil_to_array(array_to_pil(a).resize(new_size(a), resample))
+                src_img = self._output_image() if self.arr is not None else self._base_img()
+                def compute():
+                    img = src_img.resize(new_size(src), resample)
+                    return pil_to_array(img), img
             else:
-                out = resize_bilinear(arr, new_h, new_w); mname = "Bilinear"
-            dt = (time.time() - t0) * 1000
-            self.undo_stack.append(self.img.copy() if self.img is not None else None)
-            self.redo_stack.clear()
-            self.img = array_to_pil(out)
-            self._render_images()
-            self.proc_title_var.set(f"Output Image — Resize {scale}% ({mname})")
-            self._set_status(f"Resize in {dt:.1f} ms")
-            win.destroy()
+                algo = "resize_nearest" if mname == "Nearest (NumPy)" else "resize_bilinear"
+                def step(a):
+                    new_w, new_h = new_size(a)
+                    return _get(algo)(a, new_h, new_w)
+                compute = lambda: (self._cached_result(src, (algo,) + new_size(src), lambda: step(src)), None)
+            def done(result, dt):
+                out, img = result
+                self._push_result(out, step)
+                if img is not None:
+                    self._out_pil = (out, img)
+                self._render_images()
+                self.proc_title_var.set(f"Output Image — Resize {scale}% ({mname})")
+                self._set_status(f"Resize in {dt:.1f} ms")
+            if self._run_async(compute, done):
+                win.destroy()
 
         ttk.Button(win, text="Apply", command=apply).pack(pady=12)
 
@@ -613,33 +1115,30 @@ class ImageToolkitApp(tk.Tk):
                    ).pack(side="left", expand=True, fill="x", padx=(6, 0))
 
     def _thresh_manual_close(self, win, T):
-        src = self.img if self.img is not None else self.img_open
-        arr = pil_to_array(src)
-        t0 = time.time()
-        out = threshold_apply(arr, int(T))
-        dt = (time.time() - t0) * 1000
-        self.undo_stack.append(self.img.copy() if self.img is not None else None)
-        self.redo_stack.clear()
-        self.img = array_to_pil(out)
-        self._render_images()
-        self.proc_title_var.set(f"Output Image — Threshold (T={int(T)})")
-        self._set_status(f"Threshold in {dt:.1f} ms")
-        win.destroy()
+        src = self.arr if self.arr is not None else self._base_arr()
+        T = int(T)
+        step = lambda a: threshold_u8(self._get_luma(a), T)
+        def done(out, dt):
+            self._push_result(out, step)
+            self._render_images()
+            self.proc_title_var.set(f"Output Image — Threshold (T={T})")
+            self._set_status(f"Threshold in {dt:.1f} ms")
+        if self._run_async(lambda: self._cached_result(src, ("threshold", T), lambda: step(src)), done):
+            win.destroy()
 
     def _thresh_otsu_close(self, win):
-        src = self.img if self.img is not None else self.img_open
-        arr = pil_to_array(src)
-        t0 = time.time()
-        T = otsu_threshold(arr)
-        out = threshold_apply(arr, T)
-        dt = (time.time() - t0) * 1000
-        self.undo_stack.append(self.img.copy() if self.img is not None else None)
-        self.redo_stack.clear()
-        self.img = array_to_pil(out)
-        self._render_images()
-        self.proc_title_var.set(f"Output Image — Otsu (T={T})")
-        self._set_status(f"Otsu in {dt:.1f} ms")
-        win.destroy()
+        src = self.arr if self.arr is not None else self._base_arr()
+        def compute():
+            return threshold_otsu_apply(self._get_luma(src))
+        def done(result, dt):
+            T, out = result
+            # replays (full-size save) pick their own T from their own input
+            self._push_result(out, lambda a: threshold_otsu_apply(self._get_luma(a))[1])
+            self._render_images()
+            self.proc_title_var.set(f"Output Image — Otsu (T={T})")
+            self._set_status(f"Otsu in {dt:.1f} ms")
+        if self._run_async(lambda: self._cached_result(src, ("otsu",), compute), done):
+            win.destroy()
 
     def _dlg_gamma(self):
         if self.img_open is None: return
@@ -649,36 +1148,41 @@ class ImageToolkitApp(tk.Tk):
         gamma_var = self._labeled_scale(win, "Gamma (0.1–5.0)", 0.1, 5.0, 0.7, resolution=0.05)
 
         def apply():
-            src = self.img if self.img is not None else self.img_open
-            arr = pil_to_array(src)
+            src = self.arr if self.arr is not None else self._base_arr()
             gamma = float(gamma_var.get())
-            t0 = time.time()
-            out = gamma_transform(arr, gamma)
-            dt = (time.time() - t0) * 1000
-            self.undo_stack.append(self.img.copy() if self.img is not None else None)
-            self.redo_stack.clear()
-            self.img = array_to_pil(out)
-            self._render_images()
-            self.proc_title_var.set(f"Output Image — Gamma (γ={gamma:.2f})")
-            self._set_status(f"Gamma in {dt:.1f} ms")
-            win.destroy()
+            gamma_fn = lambda a: _get("gamma_transform")(a, gamma)
+            key = ("gamma", round(gamma, 2))   # scale snaps to 0.05 steps
+            step = lambda a: self._pointwise_lut(gamma_fn, key, a)
+            def done(out, dt):
+                self._push_result(out, step)
+                self._render_images()
+                self.proc_title_var.set(f"Output Image — Gamma (γ={gamma:.2f})")
+                self._set_status(f"Gamma in {dt:.1f} ms")
+            if self._run_async(lambda: self._cached_result(src, key, lambda: step(src)), done):
+                win.destroy()
 
         ttk.Button(win, text="Apply", command=apply).pack(pady=12)
 
     # ---------- Histogram Window ----------
     def show_histogram(self):
-        src = self.img if self.img is not None else self.img_open
+        if self._hist_win is not None and self._hist_win.winfo_exists():
+            self._hist_win.deiconify()
+            self._hist_win.lift()
+            self._refresh_histogram_if_open()
+            return
+        src = self.arr if self.arr is not None else self._base_arr()
         if src is None: return
-        hist = histogram_gray(pil_to_array(src))  # length 256
         win = tk.Toplevel(self); win.title("Histogram (Grayscale)")
         win.configure(bg=self.colors["bg"])
+        win.protocol("WM_DELETE_WINDOW", win.withdraw)   # hide, reopen with deiconify()
         W, H = 720, 320
         canvas = tk.Canvas(win, width=W, height=H, bg=self.colors["canvas"],
                            highlightthickness=0)
         canvas.pack(fill="both", expand=True, padx=10, pady=10)
+        ttk.Checkbutton(win, text="Log scale", variable=self._hist_log,
+                        command=self._on_hist_log).pack(anchor="w", padx=10, pady=(0, 10))
 
         padL, padR, padT, padB = 40, 20, 20, 40
-        maxh = int(hist.max()) if hist.max() > 0 else 1
 
         # Axes
         x0, y0 = padL, H - padB
@@ -687,26 +1191,105 @@ class ImageToolkitApp(tk.Tk):
         canvas.create_line(x0, y0, x0, y1, fill=self.colors["subtle"])  # y-axis
 
         # X ticks 0..255 every 64
-        for t in range(0, 256, 64):
-            tx = x0 + int(t * (x1 - x0) / 255.0)
+        for t, label in zip(range(0, 256, 64), _XTICKS):
+            tx = x0 + (t * (x1 - x0)) // 255
             canvas.create_line(tx, y0, tx, y0 + 6, fill=self.colors["subtle"])
-            canvas.create_text(tx, y0 + 16, text=str(t), fill=self.colors["subtle"], font=("Segoe UI", 8))
-
-        # Y ticks 0..max
-        for i in range(5):
-            frac = i / 4.0
-            ty = y0 - int(frac * (y0 - y1))
-            canvas.create_line(x0 - 6, ty, x0, ty, fill=self.colors["subtle"])
-            canvas.create_text(x0 - 10, ty, text=f"{int(maxh*frac)}", fill=self.colors["subtle"],
-                               font=("Segoe UI", 8), anchor="e")
-
-        # Bars
-        for i in range(256):
-            xa = x0 + int(i * (x1 - x0) / 256.0)
-            xb = x0 + int((i + 1) * (x1 - x0) / 256.0)
-            h = int((hist[i] / maxh) * (y0 - y1))
-            canvas.create_rectangle(xa, y0 - h, xb, y0,
-                                    fill=self.colors["blue"], outline="")
+            canvas.create_text(tx, y0 + 16, text=label, fill=self.colors["subtle"], font=("Segoe UI", 8))
+
+        self._hist_win, self._hist_canvas = win, canvas
+        self._hist_box = (x0, y0, x1, y1)
+        self._hist_src = None
+        self._refresh_histogram_if_open()
+
+    def _on_hist_log(self):
+        # same counts, new heights: force a redraw, normally straight from the cache
+        self._hist_src = None
+        self._refresh_histogram_if_open()
+
+    def _refresh_histogram_if_open(self):
+        """Redraw the histogram window's bars and y ticks if the shown source is stale."""
+        if self._hist_win is None or not self._hist_win.winfo_exists():
+            return
+        if self._hist_win.state() == "withdrawn":
+            return   # catch up when show_histogram brings it back
+        src = self.arr if self.arr is not None else self._base_arr()
+        if src is self._hist_src:
+            return
+        self._hist_src = src
+        if self._hist_future is not None:
+            self._hist_future.cancel()   # superseded; frees the worker if not started
+            self._hist_future = None
+        canvas, box = self._hist_canvas, self._hist_box
+        canvas.delete("bars")   # axes and x ticks stay put
+        if src is None:
+            return
+        hist = self._cached_histogram(src)
+        if hist is not None:
+            self._draw_histogram_bars(canvas, hist, box)
+            return
+
+        # count on a worker so the Tk loop stays live; poll until it is done
+        x0, y0, x1, y1 = box
+        canvas.create_text((x0 + x1) // 2, (y0 + y1) // 2, text="Computing…", tags="bars",
+                           fill=self.colors["subtle"], font=("Segoe UI", 10))
+        fut = self._hist_future = self._hist_pool.submit(self._gray_histogram, src)
+        def check():
+            if not canvas.winfo_exists() or self._hist_src is not src or fut.cancelled():
+                return   # window closed or a newer source took over
+            if not fut.done():
+                self.after(30, check)
+                return
+            self._hist_future = None
+            canvas.delete("bars")
+            err = fut.exception()
+            if err is not None:
+                self._hist_src = None   # retry on the next refresh
+                canvas.create_text((x0 + x1) // 2, (y0 + y1) // 2, text=f"Histogram failed: {err}",
+                                   tags="bars", fill=self.colors["subtle"], font=("Segoe UI", 10))
+                return
+            self._draw_histogram_bars(canvas, fut.result(), box)
+        self.after(30, check)
+
+    def _draw_histogram_bars(self, canvas, hist, box):
+        x0, y0, x1, y1 = box
+        m = int(hist.max())
+        maxh = m if m > 0 else 1
+        log = self._hist_log.get()
+
+        # Y ticks 0..max; labels only change with maxh and the scale
+        if self._hist_ylabels_cache is None or self._hist_ylabels_cache[:2] != (maxh, log):
+            if log:
+                labels = [f"{int(round(np.expm1(np.log1p(maxh) * (i/4.0))))}" for i in range(5)]
+            else:
+                labels = [str((maxh * i) // 4) for i in range(5)]
+            self._hist_ylabels_cache = (maxh, log, labels)
+        for i, label in enumerate(self._hist_ylabels_cache[2]):
+            ty = y0 - (i * (y0 - y1)) // 4
+            canvas.create_line(x0 - 6, ty, x0, ty, fill=self.colors["subtle"], tags="bars")
+            canvas.create_text(x0 - 10, ty, text=label, fill=self.colors["subtle"],
+                               font=("Segoe UI", 8), anchor="e", tags="bars")
+
+        # Bars: a two-colour bitmap of the plot area built with one NumPy mask and
+        # shown as a single image item beneath the axes
+        if log:
+            heights = np.log1p(hist) * ((y0 - y1) / np.log1p(maxh))
+        else:
+            heights = (hist * (y0 - y1)) // maxh   # integer pixels, no float round-trip
+        tops = y0 - heights.astype(np.int32)                     # bar tops
+        if self._hist_buf is None or self._hist_buf[0] != box:
+            cols = (np.arange(x1 - x0) * 256) // (x1 - x0)        # bin under each column
+            ys = np.arange(y0 + 1, dtype=np.int32)[:, None]
+            mask = np.empty((y0 + 1, x1 - x0), dtype=np.bool_)
+            rgb = np.empty(mask.shape + (3,), dtype=np.uint8)
+            self._hist_buf = (box, cols, ys, mask, rgb)
+        _, cols, ys, mask, rgb = self._hist_buf
+        # PhotoImage copies the pixels, so the buffers are safe to overwrite next time
+        np.greater_equal(ys, tops[cols][None, :], out=mask)
+        rgb[:] = ImageColor.getrgb(self.colors["canvas"])
+        rgb[mask] = ImageColor.getrgb(self.colors["blue"])
+        self._hist_photo = ImageTk.PhotoImage(array_to_pil(rgb))
+        bars = canvas.create_image(x0, 0, anchor="nw", image=self._hist_photo, tags="bars")
+        canvas.tag_lower(bars)
 
 if __name__ == "__main__":
     app = ImageToolkitApp()